@@ -4,33 +4,77 @@ import numpy as np
 import sounddevice as sd
 
 SAMPLE_RATE = 16000  # Parakeet expects 16kHz
+PREALLOC_SECONDS = 30  # Initial recording buffer size; grows if exceeded
 
 
 class AudioRecorder:
     def __init__(self, sample_rate: int = SAMPLE_RATE):
         self.sample_rate = sample_rate
-        self.buffer: list[np.ndarray] = []
+        # Samples are written straight into this preallocated buffer by the
+        # audio callback - no per-block arrays, no lock, one writer
+        self.buffer = np.empty(sample_rate * PREALLOC_SECONDS, dtype=np.float32)
+        self.length = 0
         self.stream = None
+        self.recording = False
 
     def _callback(self, indata, frames, time, status):
-        self.buffer.append(indata.copy())
+        if not self.recording:
+            return
+        end = self.length + frames
+        if end > len(self.buffer):
+            # Rare: recording outgrew the buffer, double it
+            grown = np.empty(max(end, 2 * len(self.buffer)), dtype=np.float32)
+            grown[:self.length] = self.buffer[:self.length]
+            self.buffer = grown
+        # indata is a raw CFFI buffer of mono float32 samples - view it, no copy
+        self.buffer[self.length:end] = np.frombuffer(indata, dtype=np.float32)
+        self.length = end
 
     def start(self):
-        self.buffer = []
-        self.stream = sd.InputStream(
-            samplerate=self.sample_rate,
-            channels=1,
-            dtype=np.float32,
-            callback=self._callback,
-        )
-        self.stream.start()
+        """Start capturing into the buffer.
+
+        The input stream is kept running between recordings so a PTT press
+        captures immediately instead of waiting for PortAudio to open. The
+        trade-off is that the microphone stays open from the first press
+        until close(). A stream that has died (mic unplugged, PipeWire
+        restart) is reopened here.
+        """
+        self.length = 0
+        if self.stream is None or not self.stream.active:
+            self._close_stream()
+            try:
+                self.stream = sd.RawInputStream(
+                    samplerate=self.sample_rate,
+                    channels=1,
+                    dtype='float32',
+                    callback=self._callback,
+                )
+                self.stream.start()
+            except Exception as e:
+                print(f"Failed to open audio input: {e}", flush=True)
+                self._close_stream()
+                return
+        self.recording = True
 
     def stop(self) -> np.ndarray | None:
-        if self.stream is None:
+        if not self.recording:
             return None
-        self.stream.stop()
-        self.stream.close()
-        self.stream = None
-        if not self.buffer:
+        self.recording = False
+        if self.length == 0:
             return None
-        return np.concatenate(self.buffer, axis=0).flatten()
+        return self.buffer[:self.length].copy()
+
+    def close(self):
+        """Stop recording and release the input stream."""
+        self.recording = False
+        self._close_stream()
+
+    def _close_stream(self):
+        if self.stream is None:
+            return
+        try:
+            self.stream.stop()
+            self.stream.close()
+        except Exception:
+            pass  # Already dead - nothing left to release
+        self.stream = None
@@ -7,10 +7,12 @@ gi.require_version('Gtk4LayerShell', '1.0')
 
 from gi.repository import Gtk, Gdk, GLib, Gtk4LayerShell as LayerShell
 from pathlib import Path
+import cairo
 import math
 import os
 import signal
 import threading
+import time
 from evdev import InputDevice, ecodes, list_devices
 
 # Bubble settings
@@ -284,8 +286,6 @@ class IrisBubble(Gtk.Application):
 
     def draw_position_overlay(self, area, cr, width, height):
         """Draw the position selection overlay."""
-        import cairo
-
         # Semi-transparent dark background
         cr.set_source_rgba(0, 0, 0, 0.85)
         cr.paint()
@@ -440,7 +440,6 @@ class IrisBubble(Gtk.Application):
     def start_state_listener(self):
         """Poll state file for server status."""
         def poll_state():
-            import time
             while True:
                 try:
                     if STATE_FILE.exists():
@@ -483,7 +482,6 @@ class IrisBubble(Gtk.Application):
         return True
 
     def draw_bubble(self, area, cr, width, height):
-        import cairo
         cx, cy = width / 2, height / 2 - 10  # Shift up to make room for label
         radius = 25
 
@@ -15,7 +15,9 @@ PID_FILE = Path("/tmp/iris.pid")
 class Daemon:
     def __init__(self):
         self.recorder = AudioRecorder()
+        print("Listening...", flush=True)
         self.stt = SpeechToText()
+        print("Ready", flush=True)
         self.recording = False
 
     def start_recording(self, signum=None, frame=None):
@@ -42,6 +44,7 @@ class Daemon:
             print("No audio captured")
 
     def shutdown(self, signum=None, frame=None):
+        self.recorder.close()
         PID_FILE.unlink(missing_ok=True)
         sys.exit(0)
 
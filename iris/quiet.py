@@ -0,0 +1,19 @@
+"""Stdout/stderr suppression for noisy NeMo imports and model calls."""
+
+import contextlib
+import os
+import sys
+
+# Opened once and shared - every quiet() block reuses this file
+DEVNULL = open(os.devnull, 'w')
+
+
+@contextlib.contextmanager
+def quiet():
+    """Context manager to suppress stdout/stderr."""
+    stdout, stderr = sys.stdout, sys.stderr
+    sys.stdout = sys.stderr = DEVNULL
+    try:
+        yield
+    finally:
+        sys.stdout, sys.stderr = stdout, stderr
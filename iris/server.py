@@ -1,6 +1,7 @@
 """Unified Iris server - STT (NeMo) + TTS (Kokoro) with HTTP API."""
 
 import os
+import re
 import sys
 import signal
 import logging
@@ -12,6 +13,7 @@ import time
 import socket
 import json as jsonlib
 import requests
+from concurrent.futures import Future
 from pathlib import Path
 
 # Suppress NeMo logging spam before imports
@@ -22,15 +24,17 @@ logging.disable(logging.WARNING)
 import warnings
 warnings.filterwarnings('ignore')
 
+from iris.quiet import DEVNULL
+
 # Suppress stdout/stderr during imports
 _stdout, _stderr = sys.stdout, sys.stderr
-sys.stdout = sys.stderr = open(os.devnull, 'w')
+sys.stdout = sys.stderr = DEVNULL
 
 import torch
 import numpy as np
 import soundfile as sf
+import soxr
 from flask import Flask, request, jsonify
-from nemo.collections.asr.models import EncDecMultiTaskModel
 
 sys.stdout, sys.stderr = _stdout, _stderr
 logging.disable(logging.NOTSET)
@@ -41,6 +45,7 @@ logging.getLogger('werkzeug').setLevel(logging.ERROR)
 from iris.audio import AudioRecorder
 from iris.output import paste_text
 from iris.ptt import PTTListener
+from iris.stt import SpeechToText
 
 # Config
 HOST = "127.0.0.1"
@@ -49,39 +54,43 @@ PID_FILE = Path("/tmp/iris.pid")
 STATE_FILE = Path("/tmp/iris-state")
 
 
+_last_state = None
+_state_lock = threading.Lock()  # Called from the STT loader, playback and main threads
+
+
 def set_state(state: str):
-    """Update state file for bubble to read."""
-    try:
-        STATE_FILE.write_text(state)
-    except Exception:
-        pass
+    """Update state file for bubble to read. Unchanged states are not rewritten."""
+    global _last_state
+    with _state_lock:
+        if state == _last_state:
+            return
+        try:
+            STATE_FILE.write_text(state)
+            _last_state = state
+        except Exception:
+            pass
 
 # Kokoro TTS config
 KOKORO_URL = "http://127.0.0.1:7123"
 KOKORO_START_SCRIPT = Path("/home/paul/Work/kokoro/start.sh")
 KOKORO_VOICE = "bf_isabella"
 KOKORO_VOLUME = 70  # Default volume (0-100)
+TTS_BATCH_WINDOW = 0.05  # Wait this long for more text before calling Kokoro
+TTS_BATCH_MAX_WAIT = 0.25  # Never hold a batch longer than this
+TTS_BATCH_MAX_ITEMS = 8  # Texts per Kokoro request; the rest wait for the next batch
+TTS_BATCH_MAX_CHARS = 500  # Stop collecting once a batch holds this much text
 MPV_SOCKET = "/tmp/iris-mpv-socket"  # For real-time volume control
+# Hand clips to mpv through RAM-backed files when tmpfs is available
+TMPFS_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else None
 
 # STT config
-STT_MODEL = "nvidia/canary-1b-v2"
 STT_SAMPLE_RATE = 16000
+STT_MAX_BATCH = 8  # Max utterances per model.transcribe() call
+STT_BATCH_MAX_SECONDS = 15  # Longer clips (e.g. /listen uploads) are transcribed alone
 
 app = Flask(__name__)
 
 
-def _quiet():
-    """Context manager to suppress stdout/stderr."""
-    class Quiet:
-        def __enter__(self):
-            self._stdout, self._stderr = sys.stdout, sys.stderr
-            sys.stdout = sys.stderr = open(os.devnull, 'w')
-            return self
-        def __exit__(self, *args):
-            sys.stdout, sys.stderr = self._stdout, self._stderr
-    return Quiet()
-
-
 kokoro_process = None  # Track if we started Kokoro
 bubble_process = None  # Track bubble overlay process
 
@@ -89,6 +98,26 @@ bubble_process = None  # Track bubble overlay process
 BUBBLE_SCRIPT = Path(__file__).parent / "bubble.py"
 
 
+# Text cleanup for TTS, compiled once
+_ESCAPE_RE = re.compile(r'\\[nrt]')
+_BACKSLASH_RE = re.compile(r'\\')
+_ALL_CAPS_RE = re.compile(r'\b[A-Z]{2,}\b')
+
+
+def _fix_caps(match):
+    """Title-case an ALL CAPS word, keeping short ones (API, CPU) as acronyms."""
+    word = match.group(0)
+    if len(word) <= 3:
+        return word  # Keep short acronyms
+    return word.capitalize()
+
+
+def _clear_queue(q: queue.Queue):
+    """Drop everything in a queue in one step. Nothing join()s these queues."""
+    with q.mutex:
+        q.queue.clear()
+
+
 def ensure_kokoro_running():
     """Start Kokoro TTS server if not already running."""
     global kokoro_process
@@ -168,28 +197,59 @@ def stop_bubble():
 
 class IrisServer:
     def __init__(self, load_stt=True):
-        self.stt_model = None
+        self.stt = None
         self.stt_ready = threading.Event()
         self.recorder = AudioRecorder()
         self.recording = False
         self.volume = KOKORO_VOLUME  # Current volume level
         self._mpv_proc = None  # Current mpv process for volume control
 
+        # Set while CapsLock is up; playback waits on it instead of polling
+        self._caps_released = threading.Event()
+        self._caps_released.set()
+
+        # One clip file for the server's lifetime, rewritten for each clip
+        # and unlinked in cleanup()
+        self._clip_file = tempfile.NamedTemporaryFile(suffix='.wav', dir=TMPFS_DIR, delete=True)
+
         # Audio playback queue
         self._audio_queue = queue.Queue()
         self._playback_thread = threading.Thread(target=self._playback_worker, daemon=True)
         self._playback_thread.start()
 
-        # Track CapsLock state to block new speech while held
-        self.caps_lock_held = False
+        # Text queue - rapid /speak calls are coalesced into one Kokoro request
+        self._tts_text_queue = queue.Queue()
+        # Bumped by stop_playback() so batches already taken off the queue are dropped
+        self._tts_generation = 0
+        self._tts_thread = threading.Thread(target=self._tts_worker, daemon=True)
+        self._tts_thread.start()
+
+        # Transcription queue - requests that pile up while the GPU is busy
+        # are transcribed together in one batch
+        self._stt_queue = queue.Queue()
+        self._stt_worker_thread = threading.Thread(target=self._stt_worker, daemon=True)
+        self._stt_worker_thread.start()
 
         # Load STT model in background
         if load_stt:
             self._stt_thread = threading.Thread(target=self._load_stt_model, daemon=True)
             self._stt_thread.start()
 
+    @property
+    def caps_lock_held(self) -> bool:
+        """Whether CapsLock is held - new speech is blocked while it is."""
+        return not self._caps_released.is_set()
+
+    @caps_lock_held.setter
+    def caps_lock_held(self, held: bool):
+        if held:
+            self._caps_released.clear()
+        else:
+            self._caps_released.set()
+
     def _playback_worker(self):
         """Background thread that plays audio from the queue."""
+        clip_file = self._clip_file
         while True:
             item = self._audio_queue.get()
             if item is None:  # Poison pill to clear queue
@@ -197,8 +257,7 @@ class IrisServer:
                 continue
 
             # Wait for CapsLock to be released before playing
-            while self.caps_lock_held:
-                time.sleep(0.1)
+            self._caps_released.wait()
 
             audio_bytes = item
             try:
@@ -206,24 +265,23 @@ class IrisServer:
                 # Clean up old socket
                 if os.path.exists(MPV_SOCKET):
                     os.remove(MPV_SOCKET)
-                with tempfile.NamedTemporaryFile(suffix='.wav', delete=True) as f:
-                    f.write(audio_bytes)
-                    f.flush()
-                    # Start mpv with IPC socket for real-time volume control
-                    proc = subprocess.Popen([
-                        'mpv', '--no-video', '--really-quiet',
-                        f'--volume={self.volume}',
-                        f'--input-ipc-server={MPV_SOCKET}',
-                        f.name
-                    ])
-                    self._mpv_proc = proc
-                    # Wait a moment for socket to be created, then set volume
-                    time.sleep(0.05)
-                    self._send_mpv_volume(self.volume)
-                    proc.wait()
-                    self._mpv_proc = None
-                # Brief pause between clips
-                time.sleep(0.3)
+                clip_file.seek(0)
+                clip_file.truncate()
+                clip_file.write(audio_bytes)
+                clip_file.flush()
+                # Start mpv with IPC socket for real-time volume control
+                proc = subprocess.Popen([
+                    'mpv', '--no-video', '--really-quiet', '--audio-buffer=0.02',
+                    f'--volume={self.volume}',
+                    f'--input-ipc-server={MPV_SOCKET}',
+                    clip_file.name
+                ])
+                self._mpv_proc = proc
+                # Wait a moment for socket to be created, then set volume
+                time.sleep(0.05)
+                self._send_mpv_volume(self.volume)
+                proc.wait()
+                self._mpv_proc = None
             except Exception as e:
                 print(f"Playback error: {e}", flush=True)
             finally:
@@ -252,13 +310,10 @@ class IrisServer:
         """Stop all speech - kill mpv and clear queue."""
         # Kill any running mpv processes
         subprocess.run(['pkill', '-9', 'mpv'], capture_output=True)
-        # Clear the queue
-        while not self._audio_queue.empty():
-            try:
-                self._audio_queue.get_nowait()
-                self._audio_queue.task_done()
-            except queue.Empty:
-                break
+        self._tts_generation += 1
+        # Drop text that hasn't been sent to Kokoro yet, then queued audio
+        _clear_queue(self._tts_text_queue)
+        _clear_queue(self._audio_queue)
 
     def queue_speak(self, text: str, voice: str = KOKORO_VOICE, speed: float = 1.0):
         """Request TTS from Kokoro and queue for playback."""
@@ -266,31 +321,65 @@ class IrisServer:
         if self.caps_lock_held:
             return
 
-        import re
         # Remove backslash escape sequences (e.g. \n \t \r) and stray backslashes
-        text = re.sub(r'\\[nrt]', ' ', text)
-        text = re.sub(r'\\', '', text)
+        if '\\' in text:
+            text = _ESCAPE_RE.sub(' ', text)
+            text = _BACKSLASH_RE.sub('', text)
         # Replace whitespace and collapse spaces
-        text = re.sub(r'[\n\r\t]+', ' ', text)
-        text = re.sub(r' +', ' ', text).strip()
+        text = ' '.join(text.split())
         if not text:
             return
 
         # Convert ALL CAPS words to Title Case (prevents Kokoro from spelling them out)
-        # Keep short words (3 chars or less) as-is since they're likely real acronyms (API, CPU, etc.)
-        def fix_caps(match):
-            word = match.group(0)
-            if len(word) <= 3:
-                return word  # Keep short acronyms
-            return word.capitalize()
-        text = re.sub(r'\b[A-Z]{2,}\b', fix_caps, text)
+        text = _ALL_CAPS_RE.sub(_fix_caps, text)
+
+        self._tts_text_queue.put((text, voice, speed))
 
+    def _tts_worker(self):
+        """Background thread that batches queued text into Kokoro requests."""
+        while True:
+            batch = [self._tts_text_queue.get()]
+            generation = self._tts_generation
+            chars = len(batch[0][0])
+            deadline = time.monotonic() + TTS_BATCH_MAX_WAIT
+            # Keep collecting while texts keep arriving, up to the deadline and
+            # size caps - a backlog goes out as several requests, not one huge one
+            while (time.monotonic() < deadline and generation == self._tts_generation
+                   and len(batch) < TTS_BATCH_MAX_ITEMS and chars < TTS_BATCH_MAX_CHARS):
+                try:
+                    batch.append(self._tts_text_queue.get(timeout=TTS_BATCH_WINDOW))
+                except queue.Empty:
+                    break
+                chars += len(batch[-1][0])
+
+            # Group consecutive texts with the same voice/speed, preserving order
+            groups = []
+            for text, voice, speed in batch:
+                if groups and groups[-1][0] == (voice, speed):
+                    groups[-1][1].append(text)
+                else:
+                    groups.append(((voice, speed), [text]))
+
+            for (voice, speed), texts in groups:
+                if generation != self._tts_generation:
+                    break  # Stopped while collecting or speaking this batch
+                if len(texts) == 1:
+                    text = texts[0]
+                else:
+                    # Terminate each joined text as a sentence so Kokoro pauses between them
+                    text = " ".join(t if t[-1] in '.!?' else t + '.' for t in texts)
+                self._request_speech(text, voice, speed, generation)
+
+    def _request_speech(self, text: str, voice: str, speed: float, generation: int):
+        """POST text to Kokoro and queue the resulting audio for playback."""
         try:
             resp = requests.post(
                 f"{KOKORO_URL}/speak",
                 json={"text": text, "voice": voice, "speed": speed},
                 timeout=30
             )
+            if generation != self._tts_generation:
+                return  # Playback was stopped while Kokoro was synthesizing
             if resp.status_code == 200:
                 self._audio_queue.put(resp.content)
             else:
@@ -302,25 +391,24 @@ class IrisServer:
         set_state("loading:stt")
         print("Loading STT model (Canary)...", flush=True)
         try:
-            with _quiet():
-                self.stt_model = EncDecMultiTaskModel.from_pretrained(STT_MODEL, map_location='cpu')
-                self.stt_model = self.stt_model.half().cuda()
-                self.stt_model.eval()
+            self.stt = SpeechToText()
             print("STT ready", flush=True)
             print("👂 Ready to listen", flush=True)
         except Exception as e:
             print(f"STT failed to load: {e}", flush=True)
-            self.stt_model = None
+            self.stt = None
         finally:
             set_state("ready")
             self.stt_ready.set()
 
     def cleanup(self):
-        """Release STT model and free CUDA memory."""
+        """Release the microphone and STT model, and free CUDA memory."""
+        self.recorder.close()
+        self._clip_file.close()
         print("Cleaning up models...", flush=True)
-        if self.stt_model is not None:
-            del self.stt_model
-            self.stt_model = None
+        if self.stt is not None:
+            del self.stt
+            self.stt = None
         if torch.cuda.is_available():
             torch.cuda.empty_cache()
         print("Cleanup complete", flush=True)
@@ -330,17 +418,43 @@ class IrisServer:
         if not self.stt_ready.wait(timeout=60):
             print("STT model not ready", flush=True)
             return ""
-        if self.stt_model is None:
+        if self.stt is None:
             return ""
-        with tempfile.NamedTemporaryFile(suffix='.wav', delete=True) as f:
-            sf.write(f.name, audio, STT_SAMPLE_RATE)
-            with _quiet():
-                result = self.stt_model.transcribe([f.name], source_lang='en', target_lang='en', verbose=False)
-        if result and len(result) > 0:
-            hyp = result[0]
-            text = hyp.text if hasattr(hyp, 'text') else str(hyp)
-            return text.strip()
-        return ""
+        future = Future()
+        self._stt_queue.put((audio, future))
+        return future.result()
+
+    def _stt_worker(self):
+        """Background thread that runs queued transcriptions in batches."""
+        max_samples = STT_BATCH_MAX_SECONDS * STT_SAMPLE_RATE
+        pending = []  # Taken off the queue but not yet transcribed, in arrival order
+        while True:
+            if not pending:
+                pending.append(self._stt_queue.get())
+            # Take whatever else queued up while the previous batch was running
+            while True:
+                try:
+                    pending.append(self._stt_queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            # Short clips (PTT utterances) are batched together and go first; a
+            # long one runs on its own so short clips aren't padded to its length
+            batch = [item for item in pending if len(item[0]) <= max_samples][:STT_MAX_BATCH]
+            if not batch:
+                batch = pending[:1]
+            taken = {id(item) for item in batch}
+            pending = [item for item in pending if id(item) not in taken]
+
+            try:
+                texts = self.stt.transcribe_batch([audio for audio, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), text in zip(batch, texts):
+                future.set_result(text)
 
     def start_recording(self):
         if self.recording:
@@ -408,14 +522,17 @@ def listen():
         return jsonify({"error": "missing 'audio' file"}), 400
 
     audio_file = request.files['audio']
-    audio_data, sr = sf.read(audio_file)
+    # Decode straight from the upload stream as float32 - no temp file, no float64 copy
+    audio_data, sr = sf.read(audio_file.stream, dtype='float32')
+    # Stereo uploads (e.g. arecord -f cd) come back as (frames, channels)
+    if audio_data.ndim > 1:
+        audio_data = audio_data.mean(axis=1)
 
     # Resample if needed
     if sr != STT_SAMPLE_RATE:
-        import librosa
-        audio_data = librosa.resample(audio_data, orig_sr=sr, target_sr=STT_SAMPLE_RATE)
+        audio_data = soxr.resample(audio_data, sr, STT_SAMPLE_RATE, quality='HQ')
 
-    text = server.transcribe(audio_data.astype(np.float32))
+    text = server.transcribe(audio_data)
     return jsonify({"text": text})
 
 
@@ -447,13 +564,14 @@ def handle_ptt_release():
     server.caps_lock_held = False
     audio = server.recorder.stop() if server.recording else None
     server.recording = False
+    if audio is None or len(audio) == 0:
+        return
 
     def process():
-        if audio is not None and len(audio) > 0:
-            text = server.transcribe(audio)
-            if text:
-                print(f"Transcribed: {text}")
-                paste_text(text)
+        text = server.transcribe(audio)
+        if text:
+            print(f"Transcribed: {text}")
+            paste_text(text)
 
     threading.Thread(target=process, daemon=True).start()
 
@@ -1,5 +1,6 @@
 """FastPitch + HiFi-GAN TTS wrapper."""
 
+import io
 import os
 import sys
 import logging
@@ -12,11 +13,14 @@ logging.disable(logging.WARNING)
 import warnings
 warnings.filterwarnings('ignore')
 
+from iris.quiet import DEVNULL, quiet
+
 # Suppress stdout/stderr during import
 _stdout, _stderr = sys.stdout, sys.stderr
-sys.stdout = sys.stderr = open(os.devnull, 'w')
+sys.stdout = sys.stderr = DEVNULL
 
 import torch
+import numpy as np
 import soundfile as sf
 from nemo.collections.tts.models import FastPitchModel, HifiGanModel
 
@@ -28,24 +32,12 @@ HIFIGAN_MODEL = "nvidia/tts_hifigan"
 SAMPLE_RATE = 22050
 
 
-def _quiet():
-    """Context manager to suppress stdout/stderr."""
-    class Quiet:
-        def __enter__(self):
-            self._stdout, self._stderr = sys.stdout, sys.stderr
-            sys.stdout = sys.stderr = open(os.devnull, 'w')
-            return self
-        def __exit__(self, *args):
-            sys.stdout, sys.stderr = self._stdout, self._stderr
-    return Quiet()
-
-
 class TextToSpeech:
     _instance = None
 
     def __init__(self):
         print("Loading TTS models...", file=sys.stderr, flush=True)
-        with _quiet():
+        with quiet():
             # Load FastPitch (spectrogram generator)
             self.spec_gen = FastPitchModel.from_pretrained(FASTPITCH_MODEL)
             self.spec_gen = self.spec_gen.half().cuda()
@@ -64,17 +56,16 @@ class TextToSpeech:
             cls._instance = cls()
         return cls._instance
 
-    def synthesize(self, text: str, output_path: str = None) -> bytes:
-        """Convert text to speech audio.
+    def generate(self, text: str) -> np.ndarray:
+        """Convert text to a float32 waveform at SAMPLE_RATE.
 
         Args:
             text: Text to speak
-            output_path: Optional path to save WAV file
 
         Returns:
-            Audio bytes if no output_path, else None
+            Mono float32 audio samples, ready for playback
         """
-        with torch.no_grad():
+        with torch.inference_mode():
             # Parse text to tokens
             parsed = self.spec_gen.parse(text)
 
@@ -84,14 +75,24 @@ class TextToSpeech:
             # Convert to audio waveform
             audio = self.vocoder.convert_spectrogram_to_audio(spec=spectrogram)
 
-        # Get numpy array
-        audio_np = audio.cpu().float().numpy()[0]
+        return audio[0].cpu().float().numpy()
+
+    def synthesize(self, text: str, output_path: str = None) -> bytes:
+        """Convert text to speech audio.
+
+        Args:
+            text: Text to speak
+            output_path: Optional path to save WAV file
+
+        Returns:
+            Audio bytes if no output_path, else None
+        """
+        audio_np = self.generate(text)
 
         if output_path:
             sf.write(output_path, audio_np, SAMPLE_RATE)
             return None
         else:
-            import io
             buffer = io.BytesIO()
             sf.write(buffer, audio_np, SAMPLE_RATE, format='WAV')
             return buffer.getvalue()
@@ -105,14 +106,15 @@ def speak(text: str, output_path: str = "/tmp/tts_output.wav"):
 
 
 if __name__ == "__main__":
-    import subprocess
+    import sounddevice as sd
 
     if len(sys.argv) < 2:
         print("Usage: python -m iris.tts 'text to speak'")
         sys.exit(1)
 
     text = " ".join(sys.argv[1:])
-    output = speak(text)
 
-    # Play with mpv
-    subprocess.run(["mpv", "--no-video", "--really-quiet", output], check=True)
+    # Play the waveform directly - no WAV file or mpv round-trip
+    audio = TextToSpeech.get_instance().generate(text)
+    sd.play(audio, SAMPLE_RATE)
+    sd.wait()